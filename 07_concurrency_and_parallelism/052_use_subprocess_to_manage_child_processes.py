@@ -4,10 +4,16 @@
 # import os
 # os.environ['COMSPEC'] = 'powershell'
 
+import hashlib
 import os
+import selectors
+import struct
 import subprocess
+import sys
 import time
 
+from collections import deque
+
 
 # ------------------------------------------------------------------------------
 # subprocess
@@ -178,3 +184,537 @@ except subprocess.TimeoutExpired:
     proc.wait()
 
 print('Exit status', proc.poll())
+
+
+# ------------------------------------------------------------------------------
+# Streaming pipeline runner with bounded buffers
+#   - run_encrypt / run_hash write whole input up front and communicate()
+#     keeps whole output in memory.
+#   - PipelineRunner starts N child stages per pipeline and relays data
+#     stage to stage in chunks of chunk_size.  each stage has input buffer
+#     of at most max_buffer bytes;  upstream stdout is not read while
+#     downstream buffer is full, so memory per pipeline is bounded
+#     regardless of payload size (backpressure through OS pipes).
+#   - all pipes of all pipelines are non-blocking and served by single
+#     selectors loop, no thread per pipe.
+#   - each stage has own timeout (as communicate(timeout=...) above).
+#     if stage does not finish in time, whole pipeline is killed and
+#     pipeline.error is subprocess.TimeoutExpired.
+#   - stage exiting with non-zero status kills whole pipeline too, and
+#     pipeline.error is subprocess.CalledProcessError.
+#   - per stage bytes in / out and throughput are reported.
+# ------------------------------------------------------------------------------
+
+class Stage:
+    def __init__(self, command, timeout, env):
+        self.command = command
+        self.timeout = timeout
+        self.proc = subprocess.Popen(
+            command, env=env, bufsize=0,
+            stdin=subprocess.PIPE, stdout=subprocess.PIPE)
+        os.set_blocking(self.proc.stdin.fileno(), False)
+        os.set_blocking(self.proc.stdout.fileno(), False)
+        self.buffer = bytearray()   # Pending input for this stage
+        self.input_done = False     # No more input will arrive
+        self.output_done = False
+        self.bytes_in = 0
+        self.bytes_out = 0
+        self.start = time.monotonic()
+        self.end = None
+
+    @property
+    def deadline(self):
+        if self.timeout is None:
+            return None
+        return self.start + self.timeout
+
+    def throughput(self):
+        elapsed = (self.end or time.monotonic()) - self.start
+        return self.bytes_in / elapsed if elapsed > 0 else 0.0
+
+
+class Pipeline:
+    def __init__(self, commands, source, sink, timeouts, env):
+        if timeouts is None:
+            timeouts = [None] * len(commands)
+        self.stages = [Stage(command, timeout, env)
+                       for command, timeout in zip(commands, timeouts)]
+        self.source = iter(source)
+        self.sink = sink
+        self.error = None
+        self.done = False
+
+    def kill(self, error):
+        self.error = error
+        for stage in self.stages:
+            if stage.proc.poll() is None:
+                stage.proc.kill()
+            stage.proc.wait()
+            stage.end = stage.end or time.monotonic()
+        self.done = True
+
+    def report(self):
+        lines = []
+        for stage in self.stages:
+            elapsed = (stage.end or time.monotonic()) - stage.start
+            lines.append(
+                f'{" ".join(stage.command[:2]):<16} '
+                f'in {stage.bytes_in:>10,}  out {stage.bytes_out:>10,}  '
+                f'{elapsed:6.3f} secs  '
+                f'{stage.throughput() / 2 ** 20:8.2f} MiB/s')
+        return lines
+
+
+class PipelineRunner:
+    def __init__(self, chunk_size=64 * 1024, max_buffer=256 * 1024):
+        self.chunk_size = chunk_size
+        self.max_buffer = max_buffer
+        self.selector = selectors.DefaultSelector()
+        self.pipelines = []
+        self.interest = {}
+
+    def add(self, commands, source, sink, timeouts=None, env=None):
+        # source: iterable of bytes chunks, sink: called with each output chunk
+        pipeline = Pipeline(commands, source, sink, timeouts, env)
+        self.pipelines.append(pipeline)
+        return pipeline
+
+    def watch(self, fileobj, events, data):
+        # events == 0 means not interested for now
+        current = self.interest.get(fileobj)
+        if events == current:
+            return
+        if current:
+            if events:
+                self.selector.modify(fileobj, events, data)
+            else:
+                self.selector.unregister(fileobj)
+        elif events:
+            self.selector.register(fileobj, events, data)
+        self.interest[fileobj] = events
+
+    def forget(self, fileobj):
+        self.watch(fileobj, 0, None)
+        self.interest.pop(fileobj, None)
+        fileobj.close()
+
+    def update(self, pipeline):
+        first = pipeline.stages[0]
+        while not first.input_done and len(first.buffer) < self.max_buffer:
+            try:
+                first.buffer += next(pipeline.source)
+            except StopIteration:
+                first.input_done = True
+
+        for index, stage in enumerate(pipeline.stages):
+            stdin = stage.proc.stdin
+            if not stdin.closed:
+                if stage.buffer:
+                    self.watch(stdin, selectors.EVENT_WRITE, (pipeline, index))
+                elif stage.input_done:
+                    self.forget(stdin)   # Send EOF to child
+                else:
+                    self.watch(stdin, 0, None)
+
+            stdout = stage.proc.stdout
+            if not stdout.closed:
+                downstream = pipeline.stages[index + 1:index + 2]
+                if downstream and len(downstream[0].buffer) >= self.max_buffer:
+                    self.watch(stdout, 0, None)   # Backpressure
+                else:
+                    self.watch(stdout, selectors.EVENT_READ, (pipeline, index))
+
+            returncode = stage.proc.poll()
+            if returncode:
+                stage.end = stage.end or time.monotonic()
+                self.fail(pipeline, subprocess.CalledProcessError(
+                    returncode, stage.command))
+                return
+            if stage.output_done and stage.end is None \
+                    and returncode is not None:
+                stage.end = time.monotonic()
+
+        if all(stage.end is not None for stage in pipeline.stages):
+            pipeline.done = True
+
+    def handle(self, key, events):
+        pipeline, index = key.data
+        stage = pipeline.stages[index]
+        if events & selectors.EVENT_WRITE:
+            try:
+                written = os.write(key.fd, stage.buffer[:self.chunk_size])
+            except BrokenPipeError:
+                # Child stopped reading, drop rest of its input
+                written = len(stage.buffer)
+                stage.input_done = True
+            del stage.buffer[:written]
+            stage.bytes_in += written
+        if events & selectors.EVENT_READ:
+            data = os.read(key.fd, self.chunk_size)
+            if not data:
+                stage.output_done = True
+                self.forget(stage.proc.stdout)
+                if index + 1 < len(pipeline.stages):
+                    pipeline.stages[index + 1].input_done = True
+                return
+            stage.bytes_out += len(data)
+            if index + 1 < len(pipeline.stages):
+                pipeline.stages[index + 1].buffer += data
+            else:
+                pipeline.sink(data)
+
+    def check_timeouts(self, pipeline, now):
+        for stage in pipeline.stages:
+            if stage.end is None and stage.deadline is not None \
+                    and now >= stage.deadline:
+                self.fail(pipeline, subprocess.TimeoutExpired(
+                    stage.command, stage.timeout))
+                return
+
+    def fail(self, pipeline, error):
+        for stage in pipeline.stages:
+            for fileobj in (stage.proc.stdin, stage.proc.stdout):
+                if not fileobj.closed:
+                    self.forget(fileobj)
+        pipeline.kill(error)
+
+    def run(self):
+        while True:
+            active = [p for p in self.pipelines if not p.done]
+            for pipeline in active:
+                self.update(pipeline)
+            active = [p for p in active if not p.done]
+            if not active:
+                break
+
+            deadlines = [stage.deadline for pipeline in active
+                         for stage in pipeline.stages
+                         if stage.end is None and stage.deadline is not None]
+            # Short timeout while some child has closed stdout
+            # but has not been reaped yet
+            waiting = any(stage.output_done and stage.end is None
+                          for pipeline in active for stage in pipeline.stages)
+            timeout = 0.01 if waiting else None
+            if deadlines:
+                until = max(0, min(deadlines) - time.monotonic())
+                timeout = until if timeout is None else min(timeout, until)
+
+            for key, events in self.selector.select(timeout):
+                self.handle(key, events)
+
+            now = time.monotonic()
+            for pipeline in active:
+                if not pipeline.done:
+                    self.check_timeouts(pipeline, now)
+
+    def close(self):
+        self.selector.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def chunked_random(total, chunk_size=64 * 1024):
+    # Generates payload lazily, never held in memory as whole
+    remaining = total
+    while remaining > 0:
+        size = min(chunk_size, remaining)
+        yield os.urandom(size)
+        remaining -= size
+
+
+# ----------
+# openssl 3 does not ship whirlpool in default provider, so sha256 is used
+env = os.environ.copy()
+env['password'] = 'zf7ShyBhZOraQDdE/FiZpm/m/8f9X+M1'
+encrypt_command = ['openssl', 'enc', '-des3', '-pbkdf2', '-pass', 'env:password']
+hash_command = ['openssl', 'dgst', '-sha256', '-binary']
+
+with PipelineRunner() as runner:
+    digest = bytearray()
+    pipeline = runner.add(
+        [encrypt_command, hash_command],
+        chunked_random(64 * 2 ** 20),
+        digest.extend,
+        timeouts=[30, 30],
+        env=env)
+    runner.run()
+    assert pipeline.error is None and len(digest) == 32
+    print('\n'.join(pipeline.report()))
+
+
+# ----------
+# stage timeout:  second stage never finishes
+with PipelineRunner() as runner:
+    pipeline = runner.add(
+        [['cat'], ['sleep', '10']],
+        chunked_random(1024),
+        lambda data: None,
+        timeouts=[None, 0.1])
+    start = time.time()
+    runner.run()
+    print(f'{pipeline.error!r} after {time.time() - start:.3f} seconds')
+    assert isinstance(pipeline.error, subprocess.TimeoutExpired)
+
+
+# ----------
+# stage failure:  non-zero exit status is error of pipeline
+with PipelineRunner() as runner:
+    pipeline = runner.add(
+        [['cat'], ['sh', '-c', 'cat > /dev/null; exit 3']],
+        chunked_random(1024),
+        lambda data: None)
+    runner.run()
+    print(repr(pipeline.error))
+    assert isinstance(pipeline.error, subprocess.CalledProcessError)
+    assert pipeline.error.returncode == 3
+
+
+# ----------
+# hundreds of concurrent pipelines in single selector loop
+start = time.time()
+with PipelineRunner() as runner:
+    pipelines = []
+    for _ in range(200):
+        data = b''.join(chunked_random(256 * 1024))
+        expected = hashlib.sha256(data).digest()
+        digest = bytearray()
+        pipeline = runner.add(
+            [['cat'], hash_command],
+            [data[i:i + 65536] for i in range(0, len(data), 65536)],
+            digest.extend,
+            timeouts=[60, 60])
+        pipelines.append((pipeline, digest, expected))
+    runner.run()
+
+for pipeline, digest, expected in pipelines:
+    assert pipeline.error is None and bytes(digest) == expected
+    assert [stage.proc.returncode for stage in pipeline.stages] == [0, 0]
+
+total = sum(p.stages[0].bytes_in for p, _, _ in pipelines)
+print(f'{len(pipelines)} pipelines, {total / 2 ** 20:.0f} MiB '
+      f'in {time.time() - start:.3f} seconds')
+
+# --> measured on machine with 1 CPU core
+# openssl enc      in 67,108,864  out 67,108,888   4.106 secs     15.59 MiB/s
+# openssl dgst     in 67,108,888  out         32   4.090 secs     15.65 MiB/s
+# TimeoutExpired(['sleep', '10'], 0.1) after 0.101 seconds
+# 200 pipelines, 50 MiB in 2.059 seconds
+# 64 MiB payload streams through with at most max_buffer bytes per stage
+# in Python, and 400 child processes share 1 selector loop.
+
+
+# ------------------------------------------------------------------------------
+# Child process pool:  reuse long-lived children for short jobs
+#   - Popen per job pays fork + exec + interpreter / openssl startup,
+#     which dominates when each job is small.
+#   - ChildPool keeps at most max_children long-lived workers.  request and
+#     response are framed as 4 byte big-endian length + payload over
+#     child's stdin / stdout.
+#   - jobs are dispatched to idle children, responses collected by
+#     single selector loop.  child is started lazily when job is waiting
+#     and cap is not reached.
+#   - child that dies is replaced, and job it was running is retried
+#     (up to max_retries times, then RuntimeError).  children still busy
+#     when map() fails are killed, so their replies do not leak into
+#     next map().
+# ------------------------------------------------------------------------------
+
+FRAME_HEADER = struct.Struct('>I')
+
+
+def frame(payload):
+    return FRAME_HEADER.pack(len(payload)) + payload
+
+
+# Worker child:  sha256 of each request (b'crash' exits, to show restart)
+HASH_WORKER = [sys.executable, '-c', '''
+import hashlib, os, struct, sys
+header = struct.Struct('>I')
+stdin, stdout = sys.stdin.buffer, sys.stdout.buffer
+while True:
+    head = stdin.read(header.size)
+    if len(head) < header.size:
+        break
+    payload = stdin.read(header.unpack(head)[0])
+    if payload == b'crash':
+        os._exit(1)
+    result = hashlib.sha256(payload).digest()
+    stdout.write(header.pack(len(result)) + result)
+    stdout.flush()
+''']
+
+
+class Child:
+    def __init__(self, command):
+        self.proc = subprocess.Popen(
+            command, bufsize=0,
+            stdin=subprocess.PIPE, stdout=subprocess.PIPE)
+        self.buffer = bytearray()
+        self.job = None   # (index, payload, attempts) while busy
+
+    def read_frame(self):
+        if len(self.buffer) < FRAME_HEADER.size:
+            return None
+        size = FRAME_HEADER.unpack_from(self.buffer)[0]
+        end = FRAME_HEADER.size + size
+        if len(self.buffer) < end:
+            return None
+        payload = bytes(self.buffer[FRAME_HEADER.size:end])
+        del self.buffer[:end]
+        return payload
+
+    def stop(self):
+        self.proc.stdin.close()
+        self.proc.stdout.close()
+        self.proc.wait()
+
+
+class ChildPool:
+    def __init__(self, command=HASH_WORKER, max_children=4, max_retries=1):
+        self.command = command
+        self.max_children = max_children
+        self.max_retries = max_retries
+        self.selector = selectors.DefaultSelector()
+        self.children = []
+        self.restarts = 0
+
+    def start_child(self):
+        child = Child(self.command)
+        self.selector.register(child.proc.stdout, selectors.EVENT_READ, child)
+        self.children.append(child)
+        return child
+
+    def remove_child(self, child):
+        self.selector.unregister(child.proc.stdout)
+        self.children.remove(child)
+        child.proc.kill()
+        child.stop()
+
+    def dispatch(self, child, job):
+        child.job = job
+        try:
+            child.proc.stdin.write(frame(job[1]))
+        except BrokenPipeError:
+            pass   # Death is noticed as EOF on stdout
+
+    def map(self, payloads):
+        pending = deque((i, payload, 0) for i, payload in enumerate(payloads))
+        results = [None] * len(pending)
+        remaining = len(pending)
+
+        try:
+            while remaining:
+                # Fill idle children first, then grow up to cap
+                for child in self.children:
+                    if pending and child.job is None:
+                        self.dispatch(child, pending.popleft())
+                while pending and len(self.children) < self.max_children:
+                    self.dispatch(self.start_child(), pending.popleft())
+
+                for key, _ in self.selector.select():
+                    child = key.data
+                    data = os.read(key.fd, 65536)
+                    if not data:
+                        # Died:  replace child and retry its job if any
+                        job = child.job
+                        self.remove_child(child)
+                        self.start_child()
+                        self.restarts += 1
+                        if job is None:
+                            continue
+                        index, payload, attempts = job
+                        if attempts >= self.max_retries:
+                            raise RuntimeError(f'job {index} crashed worker '
+                                               f'{attempts + 1} times')
+                        pending.appendleft((index, payload, attempts + 1))
+                        continue
+                    child.buffer += data
+                    result = child.read_frame()
+                    if result is not None:
+                        results[child.job[0]] = result
+                        child.job = None
+                        remaining -= 1
+        finally:
+            # Busy children hold replies of this call, which would be
+            # read as results of next map():  kill them
+            for child in list(self.children):
+                if child.job is not None:
+                    self.remove_child(child)
+
+        return results
+
+    def close(self):
+        for child in list(self.children):
+            self.selector.unregister(child.proc.stdout)
+            child.stop()
+        self.children.clear()
+        self.selector.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def popen_per_job(payloads):
+    results = []
+    for payload in payloads:
+        proc = subprocess.Popen(
+            hash_command, stdin=subprocess.PIPE, stdout=subprocess.PIPE)
+        out, _ = proc.communicate(payload)
+        results.append(out)
+    return results
+
+
+# ----------
+payloads = [os.urandom(1024) for _ in range(500)]
+expected = [hashlib.sha256(payload).digest() for payload in payloads]
+
+with ChildPool(max_children=2) as pool:
+    assert pool.map(payloads[:2]) == expected[:2]
+    # killed child is noticed on next job, replaced and job retried
+    pool.children[0].proc.kill()
+    assert pool.map(payloads[:4]) == expected[:4]
+    assert pool.restarts == 1 and len(pool.children) == 2
+    # killed idle child is only replaced
+    pool.children[0].proc.kill()
+    pool.children[0].proc.wait()
+    assert pool.map([b'c']) == [hashlib.sha256(b'c').digest()]
+
+# failed map() leaves no busy child behind
+with ChildPool(max_children=2, max_retries=0) as pool:
+    try:
+        pool.map([b'crash', b'x'])
+    except RuntimeError:
+        pass
+    assert all(child.job is None for child in pool.children)
+    assert pool.map([b'y']) == [hashlib.sha256(b'y').digest()]
+
+# job that always kills its worker fails after max_retries
+try:
+    with ChildPool(max_children=2) as pool:
+        pool.map([b'crash'])
+except RuntimeError as e:
+    print(e)
+
+
+start = time.time()
+assert popen_per_job(payloads) == expected
+delta = time.time() - start
+print(f'Popen per job  {len(payloads) / delta:10.1f} jobs/sec')
+
+start = time.time()
+with ChildPool(max_children=4) as pool:
+    assert pool.map(payloads) == expected
+delta = time.time() - start
+print(f'ChildPool      {len(payloads) / delta:10.1f} jobs/sec')
+
+# --> measured on machine with 1 CPU core, 500 jobs of 1 KiB
+# Popen per job       190.8 jobs/sec
+# ChildPool          3988.6 jobs/sec
+# ~20x:  process startup is paid max_children times instead of per job.
@@ -1,10 +1,15 @@
 #!/usr/bin/env PYTHONHASHSEED=1234 python3
 
+import asyncio
+import inspect
+import threading
 import time
 
 from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from threading import Thread
 from threading import Lock
+from threading import Condition
 
 from queue import Queue
 
@@ -330,3 +335,822 @@ stop_threads(resize_queue, resize_threads)
 stop_threads(upload_queue, upload_threads)
 
 print(done_queue.qsize(), 'items finished')
+
+
+# ------------------------------------------------------------------------------
+# reusable pipeline builder from ClosableQueue and StoppableWorker
+#   - each stage declares its own worker count and bounded queue size
+#     (put() blocks when queue is full --> backpressure to upstream stage)
+#   - close() propagates stage by stage, same as stop_threads() above
+#   - per-stage metrics (queue depth, items/sec, busy / blocked / idle time)
+#     to spot the bottleneck stage
+#   - exception in func does not kill the worker: it is wrapped in StageError
+#     and passed downstream in place of the result, so every item still gets
+#     task_done() and close() can not deadlock
+# ------------------------------------------------------------------------------
+
+class StageError:
+    def __init__(self, stage, item, error):
+        self.stage = stage
+        self.item = item
+        self.error = error
+
+    def __repr__(self):
+        return f'StageError({self.stage!r}, {self.item!r}, {self.error!r})'
+
+
+class MeteredWorker(StoppableWorker):
+    def __init__(self, func, in_queue, out_queue, name=None):
+        super().__init__(func, in_queue, out_queue)
+        self.name = name
+        self.items = 0
+        self.errors = 0
+        self.busy = 0.0     # Running func
+        self.blocked = 0.0  # Waiting for room in out_queue
+        self.idle = 0.0     # Waiting for item from in_queue
+
+    def run(self):
+        idle_start = time.perf_counter()
+        for item in self.in_queue:
+            busy_start = time.perf_counter()
+            result = self.call(item)
+            blocked_start = time.perf_counter()
+            self.out_queue.put(result)
+            idle_start_next = time.perf_counter()
+
+            self.idle += busy_start - idle_start
+            self.busy += blocked_start - busy_start
+            self.blocked += idle_start_next - blocked_start
+            self.items += 1
+            idle_start = idle_start_next
+        self.idle += time.perf_counter() - idle_start
+
+    def call(self, item):
+        if isinstance(item, StageError):
+            return item  # Failed upstream, skip this stage
+        try:
+            return self.func(item)
+        except Exception as e:
+            self.errors += 1
+            return StageError(self.name, item, e)
+
+    def call_batch(self, items):
+        failed = [item for item in items if isinstance(item, StageError)]
+        items = [item for item in items if not isinstance(item, StageError)]
+        if not items:
+            return failed
+        try:
+            results = self.func(items)
+        except Exception as e:
+            self.errors += len(items)
+            results = [StageError(self.name, item, e) for item in items]
+        return results + failed
+
+
+# ----------
+# batching support:  worker gets list of items at once
+#   - BatchClosableQueue takes up to batch_size items under single lock
+#     acquire, and calls task_done once per batch
+#   - batch is flushed when it is full or max_latency passed since
+#     its first item arrived
+#   - SENTINEL still stops exactly one worker: batch is cut at SENTINEL,
+#     items before it are processed, and then the worker exits
+
+class BatchClosableQueue(ClosableQueue):
+    def put_many(self, items):
+        with self.not_full:
+            for item in items:
+                if self.maxsize > 0:
+                    while self._qsize() >= self.maxsize:
+                        self.not_full.wait()
+                self._put(item)
+                self.unfinished_tasks += 1
+                self.not_empty.notify()
+
+    def task_done_many(self, count):
+        with self.all_tasks_done:
+            unfinished = self.unfinished_tasks - count
+            if unfinished < 0:
+                raise ValueError('task_done() called too many times')
+            if unfinished == 0:
+                self.all_tasks_done.notify_all()
+            self.unfinished_tasks = unfinished
+
+    def get_batch(self, batch_size, max_latency):
+        # Returns (items, got_sentinel, number of items taken from queue)
+        items = []
+        got_sentinel = False
+        with self.not_empty:
+            while not self._qsize():
+                self.not_empty.wait()
+            deadline = time.monotonic() + max_latency
+            while len(items) < batch_size:
+                if self._qsize():
+                    item = self._get()
+                    if item is self.SENTINEL:
+                        got_sentinel = True
+                        break
+                    items.append(item)
+                    continue
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                self.not_empty.wait(remaining)
+            taken = len(items) + got_sentinel
+            self.not_full.notify(taken)
+        return items, got_sentinel, taken
+
+    def iter_batches(self, batch_size, max_latency):
+        while True:
+            items, got_sentinel, taken = self.get_batch(
+                batch_size, max_latency)
+            try:
+                if items:
+                    yield items
+            finally:
+                self.task_done_many(taken)
+            if got_sentinel:
+                return  # Cause the thread to exit
+
+
+class MeteredBatchWorker(MeteredWorker):
+    def __init__(self, func, in_queue, out_queue, batch_size, max_latency,
+                 name=None):
+        super().__init__(func, in_queue, out_queue, name)
+        self.batch_size = batch_size
+        self.max_latency = max_latency
+
+    def run(self):
+        batches = self.in_queue.iter_batches(
+            self.batch_size, self.max_latency)
+        idle_start = time.perf_counter()
+        for items in batches:
+            busy_start = time.perf_counter()
+            results = self.call_batch(items)
+            blocked_start = time.perf_counter()
+            self.out_queue.put_many(results)
+            idle_start_next = time.perf_counter()
+
+            self.idle += busy_start - idle_start
+            self.busy += blocked_start - busy_start
+            self.blocked += idle_start_next - blocked_start
+            self.items += len(items)
+            idle_start = idle_start_next
+        self.idle += time.perf_counter() - idle_start
+
+
+class Stage:
+    # With batch_size, func takes list of items and returns list of results
+    def __init__(self, name, func, workers=1, queue_size=0,
+                 batch_size=None, max_latency=0.01):
+        self.name = name
+        self.func = func
+        self.workers = workers
+        self.batch_size = batch_size
+        self.max_latency = max_latency
+        self.in_queue = BatchClosableQueue(queue_size)
+        self.threads = []
+
+    def start(self, out_queue):
+        if self.batch_size is None:
+            self.threads = [
+                MeteredWorker(self.func, self.in_queue, out_queue, self.name)
+                for _ in range(self.workers)]
+        else:
+            self.threads = [
+                MeteredBatchWorker(self.func, self.in_queue, out_queue,
+                                   self.batch_size, self.max_latency,
+                                   self.name)
+                for _ in range(self.workers)]
+        for thread in self.threads:
+            thread.start()
+
+    def stop(self):
+        stop_threads(self.in_queue, self.threads)
+
+    def metrics(self, elapsed):
+        items = sum(t.items for t in self.threads)
+        errors = sum(t.errors for t in self.threads)
+        busy = sum(t.busy for t in self.threads)
+        blocked = sum(t.blocked for t in self.threads)
+        idle = sum(t.idle for t in self.threads)
+        total = (busy + blocked + idle) or 1.0
+        return {
+            'stage': self.name,
+            'workers': self.workers,
+            'queue_depth': self.in_queue.qsize(),
+            'items': items,
+            'errors': errors,
+            'items_per_sec': items / elapsed if elapsed else 0.0,
+            'busy': busy / total,
+            'blocked': blocked / total,
+            'idle': idle / total,
+        }
+
+
+class Pipeline:
+    def __init__(self):
+        self.stages = []
+        self.done_queue = BatchClosableQueue()
+        self.start_time = None
+
+    def add_stage(self, name, func, workers=1, queue_size=0,
+                  batch_size=None, max_latency=0.01):
+        self.stages.append(Stage(name, func, workers, queue_size,
+                                 batch_size, max_latency))
+        return self
+
+    def start(self):
+        out_queues = [stage.in_queue for stage in self.stages[1:]]
+        out_queues.append(self.done_queue)
+        for stage, out_queue in zip(self.stages, out_queues):
+            stage.start(out_queue)
+        self.start_time = time.perf_counter()
+        return self
+
+    def put(self, item):
+        self.stages[0].in_queue.put(item)
+
+    def put_many(self, items):
+        self.stages[0].in_queue.put_many(items)
+
+    def close(self):
+        # Upstream stage is drained before downstream stage is closed
+        for stage in self.stages:
+            stage.stop()
+        self.done_queue.close()
+
+    def results(self):
+        # Failed items come out as StageError in place of their result
+        yield from self.done_queue
+
+    def metrics(self):
+        elapsed = time.perf_counter() - self.start_time
+        return [stage.metrics(elapsed) for stage in self.stages]
+
+    def print_metrics(self):
+        for m in self.metrics():
+            print(f"{m['stage']:>10} x{m['workers']:<2} "
+                  f"depth {m['queue_depth']:>4}  "
+                  f"{m['items_per_sec']:>9,.0f} items/s  "
+                  f"busy {m['busy']:>4.0%}  blocked {m['blocked']:>4.0%}  "
+                  f"idle {m['idle']:>4.0%}  errors {m['errors']}")
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+# ----------
+# same pipeline as above, built with Pipeline
+pipeline = (Pipeline()
+            .add_stage('download', download, workers=3, queue_size=100)
+            .add_stage('resize', resize, workers=4, queue_size=100)
+            .add_stage('upload', upload, workers=5, queue_size=100))
+
+with pipeline:
+    for _ in range(1000):
+        pipeline.put(object())
+
+print(len(list(pipeline.results())), 'items finished')
+pipeline.print_metrics()
+
+
+# ----------
+# slow resize stage is the bottleneck:
+#   - upstream download is mostly blocked by full resize queue
+#   - downstream upload is mostly idle
+def slow_resize(item):
+    time.sleep(0.001)
+    return item
+
+pipeline = (Pipeline()
+            .add_stage('download', download, workers=1, queue_size=10)
+            .add_stage('resize', slow_resize, workers=2, queue_size=10)
+            .add_stage('upload', upload, workers=1, queue_size=10))
+
+with pipeline:
+    for _ in range(1000):
+        pipeline.put(object())
+    print('--- under load ---')
+    pipeline.print_metrics()
+
+print('--- finished ---')
+pipeline.print_metrics()
+
+# -->
+# --- finished ---
+#   download x1  depth    0      1,747 items/s  busy   0%  blocked  99%  idle   1%  errors 0
+#     resize x2  depth    0      1,747 items/s  busy  98%  blocked   1%  idle   1%  errors 0
+#     upload x1  depth    0      1,747 items/s  busy   0%  blocked   0%  idle  99%  errors 0
+# resize is busy all the time and its queue is full under load,
+# so resize is the stage to add workers to.
+
+
+# ------------------------------------------------------------------------------
+# benchmark:  batch size 1 / 16 / 256 on download / resize / upload stubs
+# ------------------------------------------------------------------------------
+
+def batched(func):
+    def run_batch(items):
+        return [func(item) for item in items]
+    return run_batch
+
+
+def batch_benchmark(batch_size, count=100_000):
+    pipeline = Pipeline()
+    for name, func in [('download', download), ('resize', resize),
+                       ('upload', upload)]:
+        pipeline.add_stage(name, batched(func), queue_size=1000,
+                           batch_size=batch_size, max_latency=0.01)
+
+    start = time.perf_counter()
+    with pipeline:
+        items = [object() for _ in range(count)]
+        for i in range(0, count, batch_size):
+            pipeline.put_many(items[i:i + batch_size])
+    delta = time.perf_counter() - start
+
+    finished = len(list(pipeline.results()))
+    assert finished == count
+    print(f'batch_size {batch_size:>3}:  {count / delta:>10,.0f} items/s')
+
+
+for batch_size in (1, 16, 256):
+    batch_benchmark(batch_size)
+
+# -->
+# batch_size   1:      48,242 items/s
+# batch_size  16:     188,315 items/s
+# batch_size 256:     257,721 items/s
+
+
+# ----------
+# max_latency flushes partial batch, and close still stops every worker
+pipeline = Pipeline().add_stage(
+    'resize', batched(resize), workers=3, batch_size=256, max_latency=0.05)
+
+with pipeline:
+    pipeline.put_many(range(10))
+    time.sleep(0.2)
+    assert pipeline.done_queue.qsize() == 10  # Flushed before close()
+
+assert sorted(pipeline.results()) == list(range(10))
+
+
+# ----------
+# exception in stage func:  worker survives and close() still returns
+#   (without StageError, worker dies on item 5, resize queue fills up
+#    and close() blocks forever on non-daemon threads)
+def flaky_resize(item):
+    if item == 5:
+        raise ValueError(f'can not resize {item}')
+    return item
+
+pipeline = (Pipeline()
+            .add_stage('download', download, queue_size=4)
+            .add_stage('resize', flaky_resize, queue_size=4)
+            .add_stage('upload', upload, queue_size=4))
+
+with pipeline:
+    for i in range(100):
+        pipeline.put(i)
+
+results = list(pipeline.results())
+failed = [r for r in results if isinstance(r, StageError)]
+assert len(results) == 100
+print(failed)
+
+# -->
+# [StageError('resize', 5, ValueError('can not resize 5'))]
+
+
+# ----------
+# same in batch mode:  whole batch fails, other batches go through
+def flaky_batch(items):
+    if 5 in items:
+        raise ValueError('can not resize batch')
+    return items
+
+pipeline = Pipeline().add_stage(
+    'resize', flaky_batch, queue_size=4, batch_size=4, max_latency=0.01)
+
+with pipeline:
+    for i in range(100):
+        pipeline.put(i)
+
+results = list(pipeline.results())
+assert len(results) == 100
+assert 1 <= sum(isinstance(r, StageError) for r in results) <= 4
+
+
+# ------------------------------------------------------------------------------
+# asyncio version of the pipeline
+#   - network-bound stages run as coroutines, so thousands of requests can be
+#     in flight without one OS thread per request
+#   - same stage / close semantics as ClosableQueue and StoppableWorker,
+#     built on asyncio.Queue
+#   - per-stage concurrency limit = number of worker tasks
+#   - plain (non-coroutine) func such as resize runs in executor,
+#     so CPU-heavy stage does not block the event loop
+#   - exception in func fails the whole pipeline:  every worker task is
+#     cancelled and put() / close() raise the error instead of waiting
+#     forever on join() or on a full queue
+# ------------------------------------------------------------------------------
+
+class AsyncClosableQueue(asyncio.Queue):
+    SENTINEL = object()
+
+    async def close(self):
+        await self.put(self.SENTINEL)
+
+    async def __aiter__(self):
+        while True:
+            item = await self.get()
+            try:
+                if item is self.SENTINEL:
+                    return  # Cause the worker task to exit
+                yield item
+            finally:
+                self.task_done()
+
+
+class AsyncStage:
+    def __init__(self, name, func, concurrency=1, queue_size=0,
+                 executor=None):
+        self.name = name
+        self.func = func
+        self.concurrency = concurrency
+        self.executor = executor
+        self.in_queue = AsyncClosableQueue(queue_size)
+        self.tasks = []
+        self.items = 0
+        self.in_flight = 0
+        self.peak_in_flight = 0
+
+    async def call(self, item):
+        if inspect.iscoroutinefunction(self.func):
+            return await self.func(item)
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, self.func, item)
+
+    async def worker(self, out_queue):
+        async for item in self.in_queue:
+            self.in_flight += 1
+            self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+            try:
+                result = await self.call(item)
+            except Exception as e:
+                # Cancels this task too, at its next await
+                self.on_error(self.name, item, e)
+                continue
+            finally:
+                self.in_flight -= 1
+            await out_queue.put(result)
+            self.items += 1
+
+    def start(self, out_queue, on_error):
+        self.on_error = on_error
+        self.tasks = [asyncio.create_task(self.worker(out_queue))
+                      for _ in range(self.concurrency)]
+
+    async def stop(self):
+        for _ in self.tasks:
+            await self.in_queue.close()
+        await self.in_queue.join()
+        await asyncio.gather(*self.tasks)
+
+
+class AsyncPipeline:
+    def __init__(self):
+        self.stages = []
+        self.done_queue = AsyncClosableQueue()
+        self.error = None
+        self.failed = None
+
+    def add_stage(self, name, func, concurrency=1, queue_size=0,
+                  executor=None):
+        self.stages.append(
+            AsyncStage(name, func, concurrency, queue_size, executor))
+        return self
+
+    def start(self):
+        out_queues = [stage.in_queue for stage in self.stages[1:]]
+        out_queues.append(self.done_queue)
+        self.failed = asyncio.Event()
+        for stage, out_queue in zip(self.stages, out_queues):
+            stage.start(out_queue, self.fail)
+        return self
+
+    def fail(self, stage, item, error):
+        if self.error is None:
+            self.error = StageError(stage, item, error)
+        for stage in self.stages:
+            for task in stage.tasks:
+                task.cancel()
+        self.failed.set()
+
+    async def guard(self, awaitable):
+        # Wait for awaitable, unless some stage fails first
+        op = asyncio.ensure_future(awaitable)
+        failed = asyncio.ensure_future(self.failed.wait())
+        await asyncio.wait({op, failed},
+                           return_when=asyncio.FIRST_COMPLETED)
+        failed.cancel()
+        if self.error is None:
+            return op.result()
+        op.cancel()
+        tasks = [task for stage in self.stages for task in stage.tasks]
+        await asyncio.gather(op, *tasks, return_exceptions=True)
+        raise self.error.error
+
+    async def put(self, item):
+        await self.guard(self.stages[0].in_queue.put(item))
+
+    async def close(self):
+        for stage in self.stages:
+            await self.guard(stage.stop())
+        await self.done_queue.close()
+
+    async def results(self):
+        async for item in self.done_queue:
+            yield item
+
+    def in_flight(self):
+        return {stage.name: stage.in_flight for stage in self.stages}
+
+    def print_metrics(self):
+        for stage in self.stages:
+            print(f'{stage.name:>10} x{stage.concurrency:<5} '
+                  f'depth {stage.in_queue.qsize():>5}  '
+                  f'items {stage.items:>6,}  '
+                  f'in flight {stage.in_flight:>5,}  '
+                  f'peak {stage.peak_in_flight:>5,}')
+
+    async def __aenter__(self):
+        return self.start()
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
+
+
+# ----------
+# same end-to-end test as threaded pipeline
+async def async_download(item):
+    return download(item)
+
+async def async_upload(item):
+    return upload(item)
+
+
+async def run_async_pipeline(count):
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        pipeline = (AsyncPipeline()
+                    .add_stage('download', async_download, concurrency=3)
+                    .add_stage('resize', resize, concurrency=4,
+                               executor=executor)
+                    .add_stage('upload', async_upload, concurrency=5))
+        async with pipeline:
+            for _ in range(count):
+                await pipeline.put(object())
+
+    return [item async for item in pipeline.results()]
+
+
+print(len(asyncio.run(run_async_pipeline(1000))), 'items finished')
+
+
+# ----------
+# thousands of network requests in flight within single thread
+async def slow_download(item):
+    await asyncio.sleep(0.1)  # Network round trip
+    return item
+
+async def slow_upload(item):
+    await asyncio.sleep(0.1)
+    return item
+
+
+async def run_network_pipeline(count, concurrency):
+    pipeline = (AsyncPipeline()
+                .add_stage('download', slow_download,
+                           concurrency=concurrency, queue_size=concurrency)
+                .add_stage('resize', resize, concurrency=4,
+                           queue_size=concurrency)
+                .add_stage('upload', slow_upload,
+                           concurrency=concurrency, queue_size=concurrency))
+
+    start = time.perf_counter()
+    async with pipeline:
+        for _ in range(count):
+            await pipeline.put(object())
+        await asyncio.sleep(0.05)
+        print('in flight:', pipeline.in_flight())
+    delta = time.perf_counter() - start
+
+    finished = len([item async for item in pipeline.results()])
+    print(f'{finished:,} items with concurrency {concurrency:,} '
+          f'took {delta:.2f}s, {threading.active_count()} threads')
+    pipeline.print_metrics()
+
+
+asyncio.run(run_network_pipeline(10_000, 2_000))
+
+# -->
+# 10,000 items with concurrency 2,000 took 1.16s, 6 threads
+#   download x2000  depth     0  items 10,000  in flight     0  peak 2,000
+#     resize x4     depth     0  items 10,000  in flight     0  peak     4
+#     upload x2000  depth     0  items 10,000  in flight     0  peak 1,344
+# 2,000 requests are in flight with only main thread and executor threads.
+
+
+# ----------
+# exception in stage func:  pipeline fails fast instead of hanging
+async def flaky_upload(item):
+    if item == 5:
+        raise ValueError(f'can not upload {item}')
+    return item
+
+
+async def run_flaky_pipeline(count):
+    pipeline = (AsyncPipeline()
+                .add_stage('download', async_download, queue_size=4)
+                .add_stage('upload', flaky_upload, concurrency=2,
+                           queue_size=4))
+    try:
+        async with pipeline:
+            for i in range(count):
+                await pipeline.put(i)
+    except ValueError:
+        print('pipeline failed:', pipeline.error)
+
+
+asyncio.run(asyncio.wait_for(run_flaky_pipeline(100), timeout=5))
+
+# -->
+# pipeline failed: StageError('upload', 5, ValueError('can not upload 5'))
+
+
+# ------------------------------------------------------------------------------
+# Condition-based queue:  drop-in for MyQueue, blocking get without polling
+#   - put / get keep MyQueue contract (get raises IndexError when empty),
+#     so plain Worker above runs on it unchanged
+#   - get(block=True) waits on threading.Condition until item arrives
+#     or timeout, then raises IndexError
+#   - get_many takes up to max_items under single lock acquire
+#   - items is still deque, so len(queue.items) works as above
+# ------------------------------------------------------------------------------
+
+class ConditionQueue:
+    def __init__(self):
+        self.items = deque()
+        self.lock = Lock()
+        self.not_empty = Condition(self.lock)
+
+    def put(self, item):
+        with self.not_empty:
+            self.items.append(item)
+            self.not_empty.notify()
+
+    def get(self, block=False, timeout=None):
+        with self.not_empty:
+            if not self.not_empty.wait_for(
+                    lambda: self.items, timeout if block else 0):
+                raise IndexError('get from empty queue')
+            return self.items.popleft()
+
+    def get_many(self, max_items, block=False, timeout=None):
+        with self.not_empty:
+            if not self.not_empty.wait_for(
+                    lambda: self.items, timeout if block else 0):
+                return []
+            count = min(max_items, len(self.items))
+            return [self.items.popleft() for _ in range(count)]
+
+
+class BlockingWorker(Worker):
+    # Worker.run sleeps 10 ms on IndexError. here get(block=True) blocks,
+    # and wakes up every timeout only to check the magic exit signal.
+    def __init__(self, func, in_queue, out_queue, timeout=0.1):
+        super().__init__(func, in_queue, out_queue)
+        self.timeout = timeout
+
+    def run(self):
+        while True:
+            self.polled_count += 1
+            try:
+                item = self.in_queue.get(block=True, timeout=self.timeout)
+            except IndexError:
+                continue
+            except AttributeError:
+                return
+            else:
+                result = self.func(item)
+                self.out_queue.put(result)
+                self.work_done += 1
+
+
+# ----------
+download_queue = ConditionQueue()
+resize_queue = ConditionQueue()
+upload_queue = ConditionQueue()
+done_queue = ConditionQueue()
+
+threads = [
+    BlockingWorker(download, download_queue, resize_queue),
+    BlockingWorker(resize, resize_queue, upload_queue),
+    BlockingWorker(upload, upload_queue, done_queue),
+]
+
+for thread in threads:
+    thread.start()
+
+for _ in range(1000):
+    download_queue.put(object())
+
+while len(done_queue.items) < 1000:
+    time.sleep(0.1)
+
+for thread in threads:
+    thread.in_queue = None
+    thread.join()
+
+processed = len(done_queue.items)
+polled = sum(t.polled_count for t in threads)
+
+print(f'Processed {processed} items after '
+      f'polling {polled} times')
+
+first_items = list(done_queue.items)[:10]
+assert done_queue.get_many(10) == first_items
+assert len(done_queue.get_many(5000)) == processed - 10
+assert done_queue.get_many(10) == []
+assert done_queue.get_many(10, block=True, timeout=0.01) == []
+
+# plain polling Worker on ConditionQueue:  get() does not block, so
+# worker still sees magic exit signal and shuts down
+worker = Worker(lambda item: item, ConditionQueue(), ConditionQueue())
+worker.start()
+for i in range(10):
+    worker.in_queue.put(i)
+out_queue = worker.out_queue
+while len(out_queue.items) < 10:
+    time.sleep(0.01)
+worker.in_queue = None
+worker.join(timeout=1)
+assert not worker.is_alive()
+assert out_queue.get_many(10) == list(range(10))
+
+
+# ------------------------------------------------------------------------------
+# benchmark:  enqueue --> dequeue latency (p50 / p99) and CPU time
+#   - MyQueue consumer polls and sleeps 10 ms on IndexError, same as Worker
+#   - producer puts items at fixed interval
+# ------------------------------------------------------------------------------
+
+def polling_get(queue):
+    while True:
+        try:
+            return queue.get()
+        except IndexError:
+            time.sleep(0.01)
+
+
+def latency_benchmark(name, queue, get, count=2000, interval=0.0005):
+    latencies = []
+
+    def consumer():
+        for _ in range(count):
+            sent = get(queue)
+            latencies.append(time.perf_counter() - sent)
+
+    cpu_start = time.process_time()
+    thread = Thread(target=consumer)
+    thread.start()
+    for _ in range(count):
+        queue.put(time.perf_counter())
+        time.sleep(interval)
+    thread.join()
+    cpu_time = time.process_time() - cpu_start
+
+    latencies.sort()
+    p50 = latencies[len(latencies) // 2] * 1e6
+    p99 = latencies[len(latencies) * 99 // 100] * 1e6
+    print(f'{name:>14}:  p50 {p50:>8,.0f} us  p99 {p99:>8,.0f} us  '
+          f'CPU {cpu_time:.3f}s')
+
+
+latency_benchmark('MyQueue', MyQueue(), polling_get)
+latency_benchmark('ConditionQueue', ConditionQueue(),
+                  lambda queue: queue.get(block=True))
+latency_benchmark('queue.Queue', Queue(), Queue.get)
+
+# -->
+#        MyQueue:  p50    5,145 us  p99   10,076 us  CPU 0.058s
+# ConditionQueue:  p50       21 us  p99       76 us  CPU 0.089s
+#    queue.Queue:  p50       20 us  p99       90 us  CPU 0.082s
+# polling with 10 ms sleep costs about half of sleep interval in latency.
+# shorter sleep lowers latency but burns CPU while queue is empty.
+# ConditionQueue wakes consumer as soon as item is put, same as queue.Queue.
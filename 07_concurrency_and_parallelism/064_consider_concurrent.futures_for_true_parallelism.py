@@ -1,8 +1,18 @@
 #!/usr/bin/env PYTHONHASHSEED=1234 python3
 
+import itertools
+import math
+import os
+import random
 import time
+from collections import deque
 from concurrent.futures import ThreadPoolExecutor
 from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures import as_completed
+from concurrent.futures import wait
+from concurrent.futures import FIRST_COMPLETED
+
+import numpy as np
 
 
 # ------------------------------------------------------------------------------
@@ -85,3 +95,289 @@ def main():
 
 # 0.571 secs
 main()
+
+
+# ------------------------------------------------------------------------------
+# Reusable batch-compute service
+#   - process pool is created once and kept warm, instead of new pool per call
+#   - items are sent in chunks, so pickle / IPC cost is paid per chunk,
+#     not per pair.  chunk size is picked from measured cost per item.
+#   - tiny input is run inline (or by threads), since it is cheaper than
+#     sending anything to child process
+#   - results are streamed back in order (imap) or as completed
+#     (imap_unordered), with bounded number of chunks in flight
+# ------------------------------------------------------------------------------
+
+def run_chunk(func, chunk):
+    return [func(item) for item in chunk]
+
+
+class BatchComputeService:
+    def __init__(self, max_workers=None, target_chunk_seconds=0.05,
+                 inline_seconds=0.01, thread_seconds=0.0, sample_size=8):
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.target_chunk_seconds = target_chunk_seconds
+        self.inline_seconds = inline_seconds
+        self.thread_seconds = thread_seconds
+        self.sample_size = sample_size
+        # thread_seconds > inline_seconds enables thread fallback between
+        # inline and process (useful only when func releases GIL, e.g. I/O)
+        self.pool = ProcessPoolExecutor(max_workers=self.max_workers)
+        self.threads = ThreadPoolExecutor(max_workers=self.max_workers)
+        self.last_plan = None   # (mode, chunksize) of last imap
+        # Start every child process now, not at first request
+        list(self.pool.map(abs, range(self.max_workers)))
+
+    def close(self):
+        self.pool.shutdown()
+        self.threads.shutdown()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def plan(self, func, items):
+        # Run first few items inline to measure cost per item
+        # (stop early if single item is already expensive)
+        it = iter(items)
+        sample_results = []
+        start = time.perf_counter()
+        for item in itertools.islice(it, self.sample_size):
+            sample_results.append(func(item))
+            if time.perf_counter() - start >= self.target_chunk_seconds:
+                break
+        per_item = ((time.perf_counter() - start) /
+                    max(1, len(sample_results)))
+
+        try:
+            remaining = len(items) - len(sample_results)
+        except TypeError:
+            remaining = None   # Streaming input, size is unknown
+
+        if remaining is not None:
+            estimated = per_item * remaining
+            if estimated <= self.inline_seconds:
+                mode = 'inline'
+            elif estimated <= self.thread_seconds:
+                mode = 'thread'
+            else:
+                mode = 'process'
+        else:
+            mode = 'process'
+
+        per_item = max(per_item, 1e-9)
+        chunksize = max(1, int(self.target_chunk_seconds / per_item))
+        if remaining:
+            # Keep at least few chunks per worker for load balancing
+            chunksize = min(chunksize,
+                            max(1, remaining // (self.max_workers * 4)))
+        return mode, chunksize, sample_results, it
+
+    def chunks(self, it, chunksize):
+        while True:
+            chunk = list(itertools.islice(it, chunksize))
+            if not chunk:
+                return
+            yield chunk
+
+    def submit_chunks(self, func, it, chunksize, executor):
+        # Generator of (start index, future), at most 2 chunks per worker
+        # in flight, so 10M items are never all materialized
+        in_flight = deque()
+        index = 0
+        for chunk in self.chunks(it, chunksize):
+            in_flight.append(
+                (index, executor.submit(run_chunk, func, chunk)))
+            index += len(chunk)
+            if len(in_flight) >= self.max_workers * 2:
+                yield in_flight.popleft()
+        yield from in_flight
+
+    def imap(self, func, items):
+        mode, chunksize, sample_results, it = self.plan(func, items)
+        self.last_plan = (mode, chunksize)
+        yield from sample_results
+
+        if mode == 'inline':
+            yield from map(func, it)
+            return
+
+        executor = self.threads if mode == 'thread' else self.pool
+        for _, future in self.submit_chunks(func, it, chunksize, executor):
+            yield from future.result()
+
+    def imap_unordered(self, func, items):
+        # Yields (index, result) as chunks complete
+        mode, chunksize, sample_results, it = self.plan(func, items)
+        self.last_plan = (mode, chunksize)
+        yield from enumerate(sample_results)
+        offset = len(sample_results)
+
+        if mode == 'inline':
+            yield from enumerate(map(func, it), offset)
+            return
+
+        executor = self.threads if mode == 'thread' else self.pool
+        pending = {}
+        index = offset
+        for chunk in self.chunks(it, chunksize):
+            if len(pending) >= self.max_workers * 2:
+                # Wait for a slot before pulling next chunk from input
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for f in done:
+                    yield from enumerate(f.result(), pending.pop(f))
+            pending[executor.submit(run_chunk, func, chunk)] = index
+            index += len(chunk)
+        for f in as_completed(pending):
+            yield from enumerate(f.result(), pending[f])
+
+
+# ----------
+with BatchComputeService(max_workers=2) as service:
+    start = time.time()
+    results = list(service.imap(gcd, NUMBERS))
+    delta = time.time() - start
+    print(f'Took {delta:.3f} seconds, plan {service.last_plan}')
+    assert results == list(map(gcd, NUMBERS))
+
+    unordered = dict(service.imap_unordered(gcd, NUMBERS))
+    assert [unordered[i] for i in range(len(NUMBERS))] == results
+
+
+# ------------------------------------------------------------------------------
+# scaling report:  10 to 10M pairs
+#   - small random pairs, so that single gcd is cheap and
+#     per-task overhead matters
+#   - pairs are streamed from generator above 100k, not held in list
+# ------------------------------------------------------------------------------
+
+def random_pairs(count, seed=1234):
+    rng = random.Random(seed)
+    for _ in range(count):
+        yield rng.randint(1, 200), rng.randint(1, 200)
+
+
+with BatchComputeService() as service:
+    for count in (10, 1_000, 100_000, 1_000_000, 10_000_000):
+        if count <= 100_000:
+            pairs = list(random_pairs(count))
+        else:
+            pairs = random_pairs(count)
+
+        start = time.perf_counter()
+        total = sum(service.imap(gcd, pairs))
+        delta = time.perf_counter() - start
+
+        mode, chunksize = service.last_plan
+        print(f'{count:>10,} pairs  {mode:>7}  chunksize {chunksize:>6,}  '
+              f'{delta:>8.3f}s  {count / delta:>12,.0f} pairs/s')
+
+# --> measured on machine with 1 CPU core
+#         10 pairs   inline  chunksize      1     0.000s       104,710 pairs/s
+#      1,000 pairs   inline  chunksize    248     0.003s       346,874 pairs/s
+#    100,000 pairs  process  chunksize 12,283     0.287s       348,271 pairs/s
+#  1,000,000 pairs  process  chunksize 13,324     3.740s       267,378 pairs/s
+# 10,000,000 pairs  process  chunksize 26,097    48.887s       204,553 pairs/s
+# chunks of ~10k pairs keep IPC cost small against work (pool.map with
+# one pair per task is far slower).  10M pairs stream through bounded
+# number of chunks, so memory stays flat.
+
+
+# ------------------------------------------------------------------------------
+# Fast gcd kernel
+#   - gcd() above counts down from min(a, b): O(n) per pair.
+#     it is kept as reference implementation.
+#   - gcd_euclid: math.gcd per pair (Euclid in C), O(log n) per pair.
+#     result is never negative, same as np.gcd.
+#   - gcd_batch: for large input, whole array of pairs is computed by
+#     np.gcd (vectorized Euclid in C), otherwise gcd_euclid per pair.
+#     ndarray input of shape (n, 2) returns ndarray, list input returns list.
+#     list with integers wider than int64 falls back to gcd_euclid.
+# ------------------------------------------------------------------------------
+
+def gcd_euclid(pair):
+    return math.gcd(*pair)
+
+
+VECTORIZE_THRESHOLD = 1_000
+
+def gcd_batch(pairs):
+    if isinstance(pairs, np.ndarray):
+        return np.gcd(pairs[:, 0], pairs[:, 1])
+    if len(pairs) >= VECTORIZE_THRESHOLD:
+        try:
+            array = np.asarray(pairs, dtype=np.int64)
+        except OverflowError:
+            pass   # Python int beyond int64, no C kernel for it
+        else:
+            return np.gcd(array[:, 0], array[:, 1]).tolist()
+    return [gcd_euclid(pair) for pair in pairs]
+
+
+def gcd_batch_parallel(pairs, pool, workers):
+    chunks = np.array_split(pairs, workers * 4)
+    return np.concatenate(list(pool.map(gcd_batch, chunks)))
+
+
+# ----------
+expected = list(map(gcd, NUMBERS))
+assert list(map(gcd_euclid, NUMBERS)) == expected
+assert gcd_batch(NUMBERS) == expected
+assert gcd_batch(NUMBERS * 200) == expected * 200
+assert gcd_batch(np.array(NUMBERS)).tolist() == expected
+big_pairs = [(a * 2 ** 70, b * 2 ** 70) for a, b in NUMBERS] * 200
+assert gcd_batch(big_pairs) == [value * 2 ** 70 for value in expected] * 200
+# Negative input:  list path and np.gcd path agree
+signed_pairs = [(4, -6), (-4, 6), (-4, -6), (0, -6)]
+assert gcd_batch(signed_pairs) == [2, 2, 2, 6]
+assert gcd_batch(signed_pairs * 250) == [2, 2, 2, 6] * 250
+
+
+# ------------------------------------------------------------------------------
+# benchmark:  reference / Euclid / vectorized / vectorized + process pool
+#   - reference gcd takes ~0.1 sec per pair of 7 digits numbers,
+#     so it only runs on smallest inputs
+# ------------------------------------------------------------------------------
+
+def time_kernel(func, pairs):
+    start = time.perf_counter()
+    func(pairs)
+    return time.perf_counter() - start
+
+
+workers = os.cpu_count() or 1
+with ProcessPoolExecutor(max_workers=workers) as pool:
+    list(pool.map(abs, range(workers)))  # Warm up
+
+    for count in (10, 1_000, 100_000, 1_000_000, 10_000_000):
+        rng = np.random.default_rng(1234)
+        array = rng.integers(1_000_000, 5_000_000, size=(count, 2))
+        pairs = [tuple(pair) for pair in array.tolist()] \
+            if count <= 1_000_000 else None
+
+        timings = {}
+        if count <= 10:
+            timings['reference'] = time_kernel(
+                lambda p: list(map(gcd, p)), pairs)
+        if pairs is not None:
+            timings['euclid'] = time_kernel(
+                lambda p: list(map(gcd_euclid, p)), pairs)
+        timings['vectorized'] = time_kernel(gcd_batch, array)
+        timings['vectorized+pool'] = time_kernel(
+            lambda p: gcd_batch_parallel(p, pool, workers), array)
+
+        line = '  '.join(f'{name} {delta:.4f}s'
+                         for name, delta in timings.items())
+        print(f'{count:>10,} pairs:  {line}')
+
+# --> measured on machine with 1 CPU core
+#         10 pairs:  reference 1.5464s  euclid 0.0000s  vectorized 0.0001s  vectorized+pool 0.0028s
+#      1,000 pairs:  euclid 0.0009s  vectorized 0.0001s  vectorized+pool 0.0023s
+#    100,000 pairs:  euclid 0.0816s  vectorized 0.0120s  vectorized+pool 0.0211s
+#  1,000,000 pairs:  euclid 0.6402s  vectorized 0.1211s  vectorized+pool 0.1877s
+# 10,000,000 pairs:  vectorized 1.2511s  vectorized+pool 2.2988s
+# algorithm first: Euclid is ~100,000x faster than reference per pair.
+# process pool only pays off for vectorized kernel with several cores and
+# millions of pairs, since pickling arrays costs about as much as np.gcd.
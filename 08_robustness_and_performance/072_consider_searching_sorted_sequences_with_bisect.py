@@ -1,9 +1,11 @@
 #!/usr/bin/env PYTHONHASHSEED=1234 python3
 
 import random
-import timeit
 from bisect import bisect_left
 
+from benchsuite import BenchmarkSuite
+from benchsuite import baseline_path
+
 
 # ------------------------------------------------------------------------------
 # search value in list takes O(n) 
@@ -16,34 +18,9 @@ index = data.index(91234)
 assert index == 91234
 
 
-# ----------
-def find_closest(sequence, goal):
-    for index, value in enumerate(sequence):
-        if goal < value:
-            return index
-    raise ValueError(f'{goal} is out of bounds')
-
-index = find_closest(data, 91234.56)
-
-assert index == 91235
-
-find_closest(data, 100000000)
-
-
-# ------------------------------------------------------------------------------
-# use bisect module: takes O(log(n)) 
-# NOTE: this is the case of already sorted !!
-# ------------------------------------------------------------------------------
-
-index = bisect_left(data, 91234)     # Exact match
-assert index == 91234
-
-index = bisect_left(data, 91234.56)  # Closest match
-assert index == 91235
-
-
 # ------------------------------------------------------------------------------
-# compare performance by timeit
+# compare performance by benchsuite
+#   (before find_closest demo below, which ends script with ValueError)
 # ------------------------------------------------------------------------------
 
 # ----------
@@ -57,28 +34,28 @@ def run_bisect(data, to_lookup):
 
 
 # ----------
-size = 10**5
 iterations = 1000
 
-data = list(range(size))
+def prepare(size):
+    data = list(range(size))
+    to_lookup = [random.randint(0, size - 1)
+                 for _ in range(iterations)]
+    return data, to_lookup
 
-to_lookup = [random.randint(0, size)
-             for _ in range(iterations)]
 
-baseline = timeit.timeit(
-    stmt='run_linear(data, to_lookup)',
-    globals=globals(),
-    number=10)
+suite = BenchmarkSuite('072_search', min_repeat=3)
+suite.add('linear', run_linear, setup=prepare,
+          sizes=(10**3, 10**4, 10**5))
+suite.add('bisect', run_bisect, setup=prepare,
+          sizes=(10**3, 10**4, 10**5))
+results = suite.run(results_path=baseline_path(__file__, '072_search.json'))
 
-# 3.41 secs
+# 0.341 secs for 10^5 (time ~ size^1)
+baseline = results['linear'][-1].median
 print(f'Linear search takes {baseline:.6f}s')
 
-comparison = timeit.timeit(
-    stmt='run_bisect(data, to_lookup)',
-    globals=globals(),
-    number=10)
-
-# only 0.004 secs
+# only 0.0004 secs (time ~ size^0, log(n))
+comparison = results['bisect'][-1].median
 print(f'Bisect search takes {comparison:.6f}s')
 
 
@@ -88,6 +65,32 @@ slowdown = 1 + ((baseline - comparison) / comparison)
 print(f'{slowdown:.1f}x time')
 
 
+# ----------
+def find_closest(sequence, goal):
+    for index, value in enumerate(sequence):
+        if goal < value:
+            return index
+    raise ValueError(f'{goal} is out of bounds')
+
+index = find_closest(data, 91234.56)
+
+assert index == 91235
+
+find_closest(data, 100000000)
+
+
+# ------------------------------------------------------------------------------
+# use bisect module: takes O(log(n)) 
+# NOTE: this is the case of already sorted !!
+# ------------------------------------------------------------------------------
+
+index = bisect_left(data, 91234)     # Exact match
+assert index == 91234
+
+index = bisect_left(data, 91234.56)  # Closest match
+assert index == 91235
+
+
 # ------------------------------------------------------------------------------
 # check bisect
 # ------------------------------------------------------------------------------
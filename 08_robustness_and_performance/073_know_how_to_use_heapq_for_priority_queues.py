@@ -1,10 +1,10 @@
 #!/usr/bin/env PYTHONHASHSEED=1234 python3
 
 import random
-import timeit
 import functools
 
-import math
+from benchsuite import BenchmarkSuite
+from benchsuite import baseline_path
 
 from heapq import heappush, heapify, heappop
 
@@ -92,82 +92,54 @@ else:
 
 # ------------------------------------------------------------------------------
 # queue is implemented by list
-# benchmark by timeit
+# benchmark by benchsuite
 # ------------------------------------------------------------------------------
 
-def print_results(count, tests):
-    avg_iteration = sum(tests) / len(tests)
-    print(f'Count {count:>5,} takes {avg_iteration:.6f}s')
-    return count, avg_iteration
+SIZES = (500, 1_000, 1_500, 2_000)
+RESULTS_PATH = baseline_path(__file__, '073_priority_queues.json')
 
-
-def print_delta(before, after):
-    before_count, before_time = before
-    after_count, after_time = after
-    growth = 1 + (after_count - before_count) / before_count
-    slowdown = 1 + (after_time - before_time) / before_time
-    print(f'{growth:>4.1f}x data size, {slowdown:>4.1f}x time')
+suite = BenchmarkSuite('073_priority_queues')
 
 
 # ----------
 # overdue
-def list_overdue_benchmark(count):
-    def prepare():
-        to_add = list(range(count))
-        random.shuffle(to_add)
-        return [], to_add
-
-    def run(queue, to_add):
-        for i in to_add:
-            queue.append(i)
-            queue.sort(reverse=True)
-
-        while queue:
-            queue.pop()
+def prepare_overdue(count):
+    to_add = list(range(count))
+    random.shuffle(to_add)
+    return [], to_add
+
 
-    tests = timeit.repeat(
-        setup='queue, to_add = prepare()',
-        stmt=f'run(queue, to_add)',
-        globals=locals(),
-        repeat=100,
-        number=1)
+def list_overdue(queue, to_add):
+    for i in to_add:
+        queue.append(i)
+        queue.sort(reverse=True)
 
-    return print_results(count, tests)
+    while queue:
+        queue.pop()
 
 
 # ----------
 # return
-def list_return_benchmark(count):
-    def prepare():
-        queue = list(range(count))
-        random.shuffle(queue)
-
-        to_return = list(range(count))
-        random.shuffle(to_return)
+def prepare_return(count):
+    queue = list(range(count))
+    random.shuffle(queue)
 
-        return queue, to_return
+    to_return = list(range(count))
+    random.shuffle(to_return)
 
-    def run(queue, to_return):
-        for i in to_return:
-            queue.remove(i)
+    return queue, to_return
 
-    tests = timeit.repeat(
-        setup='queue, to_return = prepare()',
-        stmt=f'run(queue, to_return)',
-        globals=locals(),
-        repeat=100,
-        number=1)
 
-    return print_results(count, tests)
+def list_return(queue, to_return):
+    for i in to_return:
+        queue.remove(i)
 
 
 # ----------
-baseline = list_overdue_benchmark(500)
-
-for count in (1_000, 1_500, 2_000):
-    print()
-    comparison = list_overdue_benchmark(count)
-    print_delta(baseline, comparison)
+case = suite.add('list_overdue', list_overdue,
+                 setup=prepare_overdue, sizes=SIZES)
+suite.run_case(case)
+suite.record(RESULTS_PATH)
 
 
 # -->
@@ -177,12 +149,10 @@ for count in (1_000, 1_500, 2_000):
 # 1500:  5.0x
 # 2000:  9.7x
 
-baseline = list_return_benchmark(500)
-
-for count in (1_000, 1_500, 2_000):
-    print()
-    comparison = list_return_benchmark(count)
-    print_delta(baseline, comparison)
+case = suite.add('list_return', list_return,
+                 setup=prepare_return, sizes=SIZES)
+suite.run_case(case)
+suite.record(RESULTS_PATH)
 
 
 # -->
@@ -193,6 +163,33 @@ for count in (1_000, 1_500, 2_000):
 # 2000: 12.4x
 
 
+# ------------------------------------------------------------------------------
+# benchmark for overdue with heapq (introduced below)
+#   (before Book demo below, which stops script with TypeError)
+# ------------------------------------------------------------------------------
+
+def heap_overdue(queue, to_add):
+    for i in to_add:
+        heappush(queue, i)
+    while queue:
+        heappop(queue)
+
+
+# n log(n) scale against 500:  2.0x -> 2.2, 3.0x -> 3.5, 4.0x -> 4.8
+case = suite.add('heap_overdue', heap_overdue,
+                 setup=prepare_overdue, sizes=SIZES)
+suite.run_case(case)
+suite.record(RESULTS_PATH)
+
+
+# -->
+# heap overdue:
+# 500:   baseline
+# 1000:  1.3x
+# 1500:  2.0x
+# 2000:  2.6x
+
+
 # ------------------------------------------------------------------------------
 # heapq (queue with priority)
 # heapq.heappush
@@ -308,48 +305,6 @@ else:
     assert False  # Doesn't happen
 
 
-# ------------------------------------------------------------------------------
-# benchmark for overdue
-# ------------------------------------------------------------------------------
-
-def heap_overdue_benchmark(count):
-    def prepare():
-        to_add = list(range(count))
-        random.shuffle(to_add)
-        return [], to_add
-
-    def run(queue, to_add):
-        for i in to_add:
-            heappush(queue, i)
-        while queue:
-            heappop(queue)
-
-    tests = timeit.repeat(
-        setup='queue, to_add = prepare()',
-        stmt=f'run(queue, to_add)',
-        globals=locals(),
-        repeat=100,
-        number=1)
-
-    return print_results(count, tests)
-
-
-baseline = heap_overdue_benchmark(500)
-
-for count in (1_000, 1_500, 2_000):
-    print(f'scale : {round(count/500 * math.log(count/500), 2)}')
-    comparison = heap_overdue_benchmark(count)
-    print_delta(baseline, comparison)
-
-
-# -->
-# heap overdue:
-# 500:   baseline
-# 1000:  1.3x
-# 1500:  2.0x
-# 2000:  2.6x
-
-
 # ------------------------------------------------------------------------------
 # return
 # ------------------------------------------------------------------------------
@@ -1,7 +1,9 @@
 #!/usr/bin/env PYTHONHASHSEED=1234 python3
 
 import os
-import timeit
+
+from benchsuite import BenchmarkSuite
+from benchsuite import baseline_path
 
 
 # ------------------------------------------------------------------------------
@@ -65,19 +67,27 @@ socket.send(chunk)
 
 
 # ----------
-def run_test():
-    chunk = video_data[byte_offset:byte_offset + size]
+CHUNK_SIZES = (1024 * 1024, 5 * 1024 * 1024, 20 * 1024 * 1024)
+RESULTS_PATH = baseline_path(__file__, '074_zero_copy.json')
+
+suite = BenchmarkSuite('074_zero_copy')
+
+
+def slice_chunk(data, byte_offset, size):
+    chunk = data[byte_offset:byte_offset + size]
     # Call socket.send(chunk), but ignoring for benchmark
 
-result = timeit.timeit(
-    stmt='run_test()',
-    globals=globals(),
-    number=100) / 100
+
+case = suite.add('bytes_slice', slice_chunk,
+                 setup=lambda size: (video_data, byte_offset, size),
+                 sizes=CHUNK_SIZES)
+result = suite.run_case(case)[-1].median
+suite.record(RESULTS_PATH)
 
 # 0.002 sec
 # upper limit of server total throughput is 20 MB / 0.002 sec = 9.77 GB/secs
 # upper limit of parallel of 500 clients = 1 CPU sec / 0.002 sec (not critical issue)
-print(f'{result:0.9f} seconds')
+print(f'{result:.3e} seconds')
 
 
 # ------------------------------------------------------------------------------
@@ -105,20 +115,17 @@ print('Underlying data:', chunk.obj)
 
 video_view = memoryview(video_data)
 
-def run_test():
-    chunk = video_view[byte_offset:byte_offset + size]
-    # Call socket.send(chunk), but ignoring for benchmark
-
-result = timeit.timeit(
-    stmt='run_test()',
-    globals=globals(),
-    number=100) / 100
+case = suite.add('memoryview_slice', slice_chunk,
+                 setup=lambda size: (video_view, byte_offset, size),
+                 sizes=CHUNK_SIZES)
+result = suite.run_case(case)[-1].median
+suite.record(RESULTS_PATH)
 
 
 # 0.000000656 secs.
 # now the program is not in CPU constraint
 # but in constraint of socket communication 
-print(f'{result:0.9f} seconds')
+print(f'{result:.3e} seconds')
 
 
 # ------------------------------------------------------------------------------
@@ -132,7 +139,7 @@ class FakeSocket:
         return video_view[byte_offset:byte_offset+size]
 
     def recv_into(self, buffer):
-        source_data = video_view[byte_offset:byte_offset+size]
+        source_data = video_view[byte_offset:byte_offset+len(buffer)]
         buffer[:] = source_data
 
 # socket connection to the client
@@ -154,26 +161,67 @@ after = video_view[byte_offset + size:]
 
 new_cache = b''.join([before, chunk, after])
 
-def run_test():
+def recv_join(video_view, byte_offset, size):
     # socket.recv return bytes instance
     chunk = socket.recv(size)
     before = video_view[:byte_offset]
     after = video_view[byte_offset + size:]
     new_cache = b''.join([before, chunk, after])
 
-result = timeit.timeit(
-    stmt='run_test()',
-    globals=globals(),
-    number=100) / 100
+
+case = suite.add('recv_join', recv_join,
+                 setup=lambda size: (video_view, byte_offset, size),
+                 sizes=CHUNK_SIZES)
+result = suite.run_case(case)[0].median
+suite.record(RESULTS_PATH)
 
 # 0.067 sec.
 # receiving throughput:  14.9 MB/sec (= 1 MB / 0.067 sec)
 # parallel client streaming video:  15 (= 14.9 / 1)
-print(f'{result:0.9f} seconds')
+print(f'{result:.3e} seconds')
 
 # --> This program does not scale well ...
 
 
+# ------------------------------------------------------------------------------
+# bytearray is mutable version of bytes
+# bytearray can be wrapped by memoryview
+#   (before bytes demo below, which stops script with TypeError)
+# ------------------------------------------------------------------------------
+
+# socket connection to the client
+socket = FakeSocket()
+# cache of incoming video stream
+video_cache = video_data[:]
+# incoming buffer position
+byte_offset = 1234
+
+# incoming chunk size: 1MB
+size = 1024 * 1024
+chunk = socket.recv(size)
+
+
+video_array = bytearray(video_cache)
+write_view = memoryview(video_array)
+chunk = write_view[byte_offset:byte_offset + size]
+socket.recv_into(chunk)
+
+def recv_into_view(write_view, byte_offset, size):
+    chunk = write_view[byte_offset:byte_offset + size]
+    socket.recv_into(chunk)
+
+
+case = suite.add('recv_into', recv_into_view,
+                 setup=lambda size: (write_view, byte_offset, size),
+                 sizes=CHUNK_SIZES)
+result = suite.run_case(case)[0].median
+suite.record(RESULTS_PATH)
+
+
+# 0.0000735 sec
+print(f'{result:.3e} seconds')
+
+
 # ------------------------------------------------------------------------------
 # bytearray is mutable version of bytes
 # bytearray can be wrapped by memoryview (zero-copy)
@@ -212,39 +260,3 @@ write_view = memoryview(video_array)
 # slicing without copy !!
 chunk = write_view[byte_offset:byte_offset + size]
 socket.recv_into(chunk)
-
-
-# ------------------------------------------------------------------------------
-# bytearray is mutable version of bytes
-# bytearray can be wrapped by memoryview
-# ------------------------------------------------------------------------------
-
-# socket connection to the client
-socket = FakeSocket()
-# cache of incoming video stream
-video_cache = video_data[:]
-# incoming buffer position
-byte_offset = 1234
-
-# incoming chunk size: 1MB
-size = 1024 * 1024
-chunk = socket.recv(size)
-
-
-video_array = bytearray(video_cache)
-write_view = memoryview(video_array)
-chunk = write_view[byte_offset:byte_offset + size]
-socket.recv_into(chunk)
-
-def run_test():
-    chunk = write_view[byte_offset:byte_offset + size]
-    socket.recv_into(chunk)
-
-result = timeit.timeit(
-    stmt='run_test()',
-    globals=globals(),
-    number=100) / 100
-
-
-# 0.0000735 sec
-print(f'{result:0.9f} seconds')
@@ -0,0 +1,237 @@
+#!/usr/bin/env PYTHONHASHSEED=1234 python3
+
+import json
+import math
+import os
+import statistics
+import time
+
+
+# ------------------------------------------------------------------------------
+# Benchmark suite shared by scaling experiments (071 - 074)
+#   - Case:  setup(size) builds fresh arguments (not timed),
+#            run(*arguments) is timed number times per sample, and
+#            sample is total time / number (like timeit).
+#   - number is calibrated per size like timeit.Timer.autorange
+#     (1, 2, 5, 10, 20, ... until sample takes min_time secs), so
+#     sub-microsecond cases are not timer noise.  repeat count is
+#     calibrated so each measurement takes about target_time secs
+#     (between min_repeat and max_repeat).
+#   - per size:  median / p95, and growth against first size
+#     (same output as former print_results / print_delta).
+#   - complexity exponent k of time ~ size^k is fitted by least squares
+#     on log(median) vs log(size):  ~1 is O(n), ~2 is O(n^2).
+#   - record(path) compares cases run so far against baseline JSON and
+#     flags sizes whose median got slower than threshold.  baseline is
+#     only written for cases it does not have yet, or for all cases when
+#     update_baseline is set (or BENCH_UPDATE_BASELINE=1), so regression
+#     does not silently become next baseline.
+# ------------------------------------------------------------------------------
+
+class Case:
+    def __init__(self, name, run, setup=None, sizes=(1,), number=None):
+        self.name = name
+        self.run = run
+        self.setup = setup
+        self.sizes = sizes
+        self.number = number   # None:  calibrated per size
+
+    def arguments(self, size):
+        if self.setup is None:
+            return ()
+        arguments = self.setup(size)
+        if not isinstance(arguments, tuple):
+            arguments = (arguments,)
+        return arguments
+
+    def time_once(self, size, number=1):
+        # Each call gets fresh arguments, built before timer starts
+        arguments = [self.arguments(size) for _ in range(number)]
+        run = self.run
+        start = time.perf_counter()
+        for args in arguments:
+            run(*args)
+        return (time.perf_counter() - start) / number
+
+
+class Result:
+    def __init__(self, size, timings, number=1):
+        self.size = size
+        self.timings = timings
+        self.number = number
+        self.median = statistics.median(timings)
+        if len(timings) >= 2:
+            self.p95 = statistics.quantiles(timings, n=20)[-1]
+        else:
+            self.p95 = timings[0]
+
+    def to_json(self):
+        return {'size': self.size, 'repeat': len(self.timings),
+                'number': self.number,
+                'median': self.median, 'p95': self.p95}
+
+
+def fit_exponent(results):
+    points = [(math.log(r.size), math.log(r.median))
+              for r in results if r.size > 0 and r.median > 0]
+    if len(points) < 2:
+        return None
+    mean_x = sum(x for x, _ in points) / len(points)
+    mean_y = sum(y for _, y in points) / len(points)
+    variance = sum((x - mean_x) ** 2 for x, _ in points)
+    if variance == 0:
+        return None
+    covariance = sum((x - mean_x) * (y - mean_y) for x, y in points)
+    return covariance / variance
+
+
+class BenchmarkSuite:
+    def __init__(self, name, target_time=0.2, min_repeat=5,
+                 max_repeat=1000, threshold=1.25, min_time=0.01,
+                 update_baseline=None):
+        self.name = name
+        self.target_time = target_time
+        self.min_repeat = min_repeat
+        self.max_repeat = max_repeat
+        self.threshold = threshold
+        self.min_time = min_time
+        if update_baseline is None:
+            update_baseline = os.environ.get('BENCH_UPDATE_BASELINE') == '1'
+        self.update_baseline = update_baseline
+        self.cases = []
+        self.results = {}
+        self.recorded = set()
+
+    def add(self, name, run, setup=None, sizes=(1,), number=None):
+        case = Case(name, run, setup, sizes, number)
+        self.cases.append(case)
+        return case
+
+    def case(self, sizes=(1,), setup=None, number=None):
+        # Decorator form:  decorated function is run
+        def decorator(run):
+            self.add(run.__name__, run, setup, sizes, number)
+            return run
+        return decorator
+
+    def autorange(self, case, size):
+        # Same steps as timeit.Timer.autorange:  1, 2, 5, 10, 20, 50, ...
+        if case.number is not None:
+            return case.number, case.time_once(size, case.number)
+        i = 1
+        while True:
+            for number in (i, 2 * i, 5 * i):
+                sample = case.time_once(size, number)
+                if sample * number >= self.min_time:
+                    return number, sample
+            i *= 10
+
+    def calibrate(self, case, size):
+        number, sample = self.autorange(case, size)
+        if sample <= 0:
+            return number, self.max_repeat
+        repeat = int(self.target_time / (sample * number))
+        return number, max(self.min_repeat, min(self.max_repeat, repeat))
+
+    def measure(self, case, size):
+        number, repeat = self.calibrate(case, size)
+        timings = [case.time_once(size, number) for _ in range(repeat)]
+        return Result(size, timings, number)
+
+    def run_case(self, case):
+        print(f'\n{self.name}: {case.name}')
+        results = []
+        for size in case.sizes:
+            result = self.measure(case, size)
+            line = (f'Count {size:>9,} takes {result.median:.3e}s '
+                    f'(p95 {result.p95:.3e}s, {len(result.timings)} runs '
+                    f'x {result.number:,})')
+            if results:
+                base = results[0]
+                line += (f'  {size / base.size:>5.1f}x data size, '
+                         f'{result.median / base.median:>5.1f}x time')
+            print(line)
+            results.append(result)
+        exponent = fit_exponent(results)
+        if exponent is not None:
+            print(f'time ~ size^{exponent:.2f}')
+        self.results[case.name] = results
+        return results
+
+    def run(self, results_path=None):
+        # Runs cases not run yet (run_case can be called section by section)
+        for case in self.cases:
+            if case.name not in self.results:
+                self.run_case(case)
+        if results_path is not None:
+            self.record(results_path)
+        return self.results
+
+    def record(self, results_path):
+        # Checks cases run since last record() against baseline
+        names = [name for name in self.results if name not in self.recorded]
+        self.recorded.update(names)
+        baseline = {'suite': self.name, 'cases': {}}
+        if os.path.exists(results_path):
+            baseline = self.load(results_path)
+            self.report_regressions(baseline, names)
+        changed = False
+        for name in names:
+            if self.update_baseline or name not in baseline['cases']:
+                baseline['cases'][name] = self.case_json(name)
+                changed = True
+        if changed:
+            self.save(results_path, baseline)
+
+    def case_json(self, name):
+        results = self.results[name]
+        return {'exponent': fit_exponent(results),
+                'results': [result.to_json() for result in results]}
+
+    def to_json(self):
+        return {
+            'suite': self.name,
+            'cases': {name: self.case_json(name) for name in self.results},
+        }
+
+    def save(self, path, data=None):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(path, 'w') as f:
+            json.dump(self.to_json() if data is None else data, f, indent=2)
+
+    @staticmethod
+    def load(path):
+        with open(path) as f:
+            return json.load(f)
+
+    def regressions(self, previous, names=None):
+        found = []
+        for name, results in self.results.items():
+            if names is not None and name not in names:
+                continue
+            before = previous.get('cases', {}).get(name)
+            if before is None:
+                continue
+            medians = {r['size']: r['median'] for r in before['results']}
+            for result in results:
+                old = medians.get(result.size)
+                if old and result.median > old * self.threshold:
+                    found.append((name, result.size, old, result.median))
+        return found
+
+    def report_regressions(self, previous, names=None):
+        found = self.regressions(previous, names)
+        for name, size, old, new in found:
+            print(f'REGRESSION {self.name}: {name} size {size:,} '
+                  f'{old:.3e}s -> {new:.3e}s ({new / old:.1f}x)')
+        if not found:
+            print(f'{self.name}: no regression against baseline')
+        return found
+
+
+def baseline_path(script, name):
+    # Next to script, not relative to cwd
+    directory = os.path.dirname(os.path.abspath(script))
+    return os.path.join(directory, '00_bench_results', name)